@@ -4,7 +4,7 @@ Los usuarios SOLO pueden consultar saldo y ver historial. No se permiten otras o
 """
 
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from database import db
 from errors import CardNotRegisteredError
@@ -30,46 +30,48 @@ class BankTerminal:
             "queried_at": datetime.now().isoformat()
         }
     
-    """Mostrar el historial completo de transacciones (pagos y recargas)."""
-    def view_transaction_history(self, card_id: str) -> Dict[str, Any]:
+    """Mostrar el historial de transacciones (pagos y recargas), paginado.
 
+    Devuelve como máximo `limit` transacciones, de la más reciente a la más antigua.
+    Para obtener la página siguiente, pasar el `next_cursor` de la respuesta como
+    `cursor`; es `None` cuando no quedan transacciones más antiguas.
+    `transaction_count` es el total de transacciones de la tarjeta, y
+    `transactions` contiene solo la página pedida.
+    Lanza ValueError si `limit` es menor que 1 o `cursor` es negativo.
+    """
+    def view_transaction_history(self, card_id: str, limit: int = 50,
+                                 cursor: Optional[int] = None) -> Dict[str, Any]:
+
+        # Validar parámetros de paginación
+        if limit < 1:
+            raise ValueError(f"limit debe ser al menos 1 (recibido {limit})")
+        if cursor is not None and cursor < 0:
+            raise ValueError(f"cursor no puede ser negativo (recibido {cursor})")
+        
         card = db.get_card(card_id)
         if not card:
             raise CardNotRegisteredError(card_id)
         
-        # Obtener todas las transacciones de esta tarjeta
-        transactions = db.get_card_transactions(card_id)
+        transaction_count = db.count_card_transactions(card_id)
+        
+        # El cursor es una posición en la lista cronológica: la página contiene
+        # las transacciones anteriores a esa posición, así las nuevas
+        # transacciones no desplazan las páginas ya consultadas
+        end = transaction_count if cursor is None else min(cursor, transaction_count)
+        start = max(end - limit, 0)
         
-        # Formatear transacciones
-        transaction_list = []
-        for txn in transactions:
-            txn_data = {
-                "transaction_id": txn.transaction_id,
-                "type": txn.transaction_type.value,
-                "amount": txn.amount,
-                "timestamp": txn.timestamp.isoformat(),
-                "description": txn.description
-            }
-            
-            # Añadir ID de terminal para pagos
-            if txn.terminal_id:
-                txn_data["terminal_id"] = txn.terminal_id
-            
-            # Añadir ID de organizador para recargas
-            if txn.organizer_id:
-                txn_data["organizer_id"] = txn.organizer_id
-            
-            transaction_list.append(txn_data)
+        # Más recientes primero; la lista ya está en orden de inserción, que
+        # coincide con el orden cronológico. Las entradas son copias, así que el
+        # llamador puede modificarlas sin tocar el historial
+        transaction_list = db.get_card_history(card_id, start, end)
+        transaction_list.reverse()
         
         return {
             "card_id": card.card_id,
             "user_id": card.user_id,
             "current_balance": card.balance,
-            "transaction_count": len(transaction_list),
-            "transactions": sorted(
-                transaction_list,
-                key=lambda x: x["timestamp"],
-                reverse=True  # Más recientes primero
-            ),
+            "transaction_count": transaction_count,
+            "transactions": transaction_list,
+            "next_cursor": start if start > 0 else None,
             "queried_at": datetime.now().isoformat()
         }
@@ -3,11 +3,36 @@ Esquema de base de datos y modelos de datos para el Sistema de Pago con Tarjetas
 Este módulo define todas las estructuras de datos necesarias para el sistema.
 """
 
+import itertools
+import math
+import sys
+import threading
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
 from dataclasses import dataclass, field
 
+from errors import InvalidAmountError, UserAlreadyExistsError
+
+
+"""Convertir un monto en pesos a centavos enteros (los saldos se guardan en centavos).
+
+Lanza InvalidAmountError si el monto no es finito o no es un número entero de
+centavos (p. ej. 0.005), en lugar de redondearlo y cobrar otra cantidad.
+"""
+def to_cents(amount: float) -> int:
+    if not math.isfinite(amount):
+        raise InvalidAmountError(amount)
+    
+    # str() da la representación decimal más corta del float, sin ruido binario
+    cents = Decimal(str(amount)) * 100
+    if cents != cents.to_integral_value():
+        raise InvalidAmountError(amount)
+    return int(cents)
+
+
 
 """Tipos de transacción"""
 class TransactionType(Enum):
@@ -17,7 +42,7 @@ class TransactionType(Enum):
 
 
 """Usuario"""
-@dataclass
+@dataclass(slots=True)
 class User:
     user_id: str
     name: str
@@ -25,16 +50,21 @@ class User:
 
 
 """Tarjeta del Evento"""
-@dataclass
+@dataclass(slots=True)
 class Card:
     card_id: str
     user_id: str
-    balance: float
+    balance_cents: int
+
+    """Saldo en pesos"""
+    @property
+    def balance(self) -> float:
+        return self.balance_cents / 100
 
 
 
 """Registro de transacción (pagos y recargas)"""
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     transaction_id: str
     card_id: str
@@ -44,6 +74,37 @@ class Transaction:
     terminal_id: Optional[str] = None  # Para pagos
     organizer_id: Optional[str] = None  # Para recargas
     description: str = ""
+    timestamp_iso: str = field(init=False, repr=False, compare=False)
+    # Entrada de historial de solo lectura, calculada al registrar la transacción
+    history_entry: Optional[Mapping[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Las transacciones no cambian: el timestamp se formatea una sola vez
+        self.timestamp_iso = self.timestamp.isoformat()
+
+
+
+# Número de locks de saldo (potencia de 2)
+_N_STRIPES = 256
+
+
+"""Formatear una transacción para el historial del terminal bancario"""
+def _format_transaction(txn: Transaction) -> Dict[str, Any]:
+    txn_data = {
+        "transaction_id": txn.transaction_id,
+        "type": txn.transaction_type.value,
+        "amount": txn.amount,
+        "timestamp": txn.timestamp_iso,
+        "description": txn.description
+    }
+    
+    # Los pagos llevan el ID de terminal y las recargas el ID de organizador
+    if txn.transaction_type is TransactionType.PAYMENT:
+        txn_data["terminal_id"] = txn.terminal_id
+    else:
+        txn_data["organizer_id"] = txn.organizer_id
+    
+    return txn_data
 
 
 
@@ -55,12 +116,25 @@ class Database:
         self.cards: Dict[str, Card] = {}
         self.transactions: List[Transaction] = []
         
-        # Contador para generar IDs
-        self._transaction_counter = 0
+        # Índice secundario: transacciones agrupadas por tarjeta
+        self._by_card: Dict[str, List[Transaction]] = {}
+        
+        # Locks por franjas para la lectura-modificación-escritura de saldos:
+        # tarjetas distintas rara vez comparten lock y pueden operar en paralelo
+        self._stripes = [threading.Lock() for _ in range(_N_STRIPES)]
+        
+        # Contador para generar IDs (el incremento de itertools.count es atómico bajo el GIL)
+        self._transaction_counter = itertools.count(1)
     
-    """Añadir un usuario a la base de datos"""
+    """Añadir un usuario a la base de datos (el ID no puede estar repetido)"""
     def add_user(self, user: User) -> None:
-        self.users[user.user_id] = user
+        user.user_id = sys.intern(user.user_id)
+        if self.users.setdefault(user.user_id, user) is not user:
+            raise UserAlreadyExistsError(user.user_id)
+    
+    """Comprobar si existe un usuario"""
+    def user_exists(self, user_id: str) -> bool:
+        return user_id in self.users
 
     """Obtener un usuario por ID"""    
     def get_user(self, user_id: str) -> Optional[User]:
@@ -68,28 +142,70 @@ class Database:
     
     """Añadir una tarjeta a la base de datos"""
     def add_card(self, card: Card) -> None:
+        # Los IDs se repiten en cada transacción: internarlos evita copias duplicadas
+        card.card_id = sys.intern(card.card_id)
+        card.user_id = sys.intern(card.user_id)
         self.cards[card.card_id] = card
     
+    """Añadir varias tarjetas a la base de datos"""
+    def add_cards_bulk(self, cards: List[Card]) -> None:
+        for card in cards:
+            self.add_card(card)
+    
     """Obtener una tarjeta por ID"""
     def get_card(self, card_id: str) -> Optional[Card]:
         return self.cards.get(card_id)
     
     """Actualizar una tarjeta en la base de datos"""
     def update_card(self, card: Card) -> None:
-        self.cards[card.card_id] = card
+        with self._lock(card.card_id):
+            self.cards[card.card_id] = card
+
+    """Obtener el lock de la franja que corresponde a una tarjeta"""
+    def _lock(self, card_id: str) -> threading.Lock:
+        return self._stripes[hash(card_id) & (_N_STRIPES - 1)]
+
+    """Sumar `delta_cents` al saldo de una tarjeta de forma atómica.
+
+    Devuelve el nuevo saldo en centavos, o None si la tarjeta no existe o si el
+    saldo quedaría negativo (en ese caso la tarjeta no se modifica).
+    """
+    def apply_delta(self, card_id: str, delta_cents: int) -> Optional[int]:
+        with self._lock(card_id):
+            card = self.cards.get(card_id)
+            if card is None or card.balance_cents + delta_cents < 0:
+                return None
+            card.balance_cents += delta_cents
+            return card.balance_cents
 
     """Añadir una transacción a la base de datos"""
     def add_transaction(self, transaction: Transaction) -> None:
+        transaction.card_id = sys.intern(transaction.card_id)
+        if transaction.terminal_id is not None:
+            transaction.terminal_id = sys.intern(transaction.terminal_id)
+        if transaction.organizer_id is not None:
+            transaction.organizer_id = sys.intern(transaction.organizer_id)
+        # Las transacciones no cambian: la entrada de historial se formatea una sola vez
+        transaction.history_entry = MappingProxyType(_format_transaction(transaction))
         self.transactions.append(transaction)
+        self._by_card.setdefault(transaction.card_id, []).append(transaction)
     
-    """Obtener todas las transacciones de una tarjeta específica"""
+    """Obtener todas las transacciones de una tarjeta específica, en orden cronológico"""
     def get_card_transactions(self, card_id: str) -> List[Transaction]:
-        return [t for t in self.transactions if t.card_id == card_id]
+        # Copia: modificar la lista devuelta no debe alterar el índice
+        return list(self._by_card.get(card_id, ()))
+    
+    """Contar las transacciones de una tarjeta"""
+    def count_card_transactions(self, card_id: str) -> int:
+        return len(self._by_card.get(card_id, ()))
+    
+    """Obtener las entradas de historial [start:end] de una tarjeta, en orden cronológico (copias nuevas)"""
+    def get_card_history(self, card_id: str, start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [dict(t.history_entry) for t in self._by_card.get(card_id, [])[start:end]]
     
     """Generar un ID de transacción único"""
     def generate_transaction_id(self) -> str:
-        self._transaction_counter += 1
-        return f"TXN{self._transaction_counter:08d}"
+        return "TXN%08d" % next(self._transaction_counter)
 
 
 # Instancia global de base de datos
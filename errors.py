@@ -1,32 +1,52 @@
 """
 Clases de errores para el Sistema de Pago con Tarjetas de Eventos.
 Todas las excepciones personalizadas con mensajes de error específicos.
+Los mensajes se formatean al convertir la excepción a texto, no al lanzarla;
+los args guardan los datos crudos para que repr y pickle sigan funcionando.
 """
 
+import math
+from typing import Optional
+
 
 """Excepción base para todos los errores de tarjetas de eventos"""
 class EventCardError(Exception):
-    pass
+    _msg: Optional[str] = None
+
+    """Construir el mensaje de error (las subclases con datos lo sobrescriben)"""
+    def _format(self) -> str:
+        return super().__str__()
+
+    def __str__(self) -> str:
+        if self._msg is None:
+            self._msg = self._format()
+        return self._msg
 
 
 """La tarjeta no está registrada para este evento"""
 class CardNotRegisteredError(EventCardError):
     def __init__(self, card_id: str):
-        super().__init__(f"ERROR: Tarjeta {card_id} no registrada para este evento")
+        super().__init__(card_id)
         self.card_id = card_id
 
+    def _format(self) -> str:
+        return f"ERROR: Tarjeta {self.card_id} no registrada para este evento"
+
 
 """La tarjeta tiene saldo insuficiente para la transacción"""
 class InsufficientBalanceError(EventCardError):
     def __init__(self, card_id: str, balance: float, amount: float):
-        super().__init__(
-            f"ERROR: Saldo insuficiente. La tarjeta {card_id} tiene ${balance:.2f}, "
-            f"pero se requieren ${amount:.2f}"
-        )
+        super().__init__(card_id, balance, amount)
         self.card_id = card_id
         self.balance = balance
         self.amount = amount
 
+    def _format(self) -> str:
+        return (
+            f"ERROR: Saldo insuficiente. La tarjeta {self.card_id} tiene ${self.balance:.2f}, "
+            f"pero se requieren ${self.amount:.2f}"
+        )
+
 
 """La conexión al sistema ha fallado"""
 class ConnectionFailureError(EventCardError):
@@ -37,19 +57,41 @@ class ConnectionFailureError(EventCardError):
 """El usuario no existe"""
 class UserNotFoundError(EventCardError):
     def __init__(self, user_id: str):
-        super().__init__(f"ERROR: Usuario {user_id} no encontrado")
+        super().__init__(user_id)
         self.user_id = user_id
 
+    def _format(self) -> str:
+        return f"ERROR: Usuario {self.user_id} no encontrado"
+
+
+"""El ID de usuario ya existe en el sistema"""
+class UserAlreadyExistsError(EventCardError):
+    def __init__(self, user_id: str):
+        super().__init__(user_id)
+        self.user_id = user_id
+
+    def _format(self) -> str:
+        return f"ERROR: El usuario {self.user_id} ya existe"
+
 
 """El ID de tarjeta ya existe en el sistema"""
 class CardAlreadyExistsError(EventCardError):
     def __init__(self, card_id: str):
-        super().__init__(f"ERROR: La tarjeta {card_id} ya existe")
+        super().__init__(card_id)
         self.card_id = card_id
 
+    def _format(self) -> str:
+        return f"ERROR: La tarjeta {self.card_id} ya existe"
+
 
-"""El monto es inválido (negativo o cero)"""
+"""El monto es inválido (negativo, cero, no finito o con fracciones de centavo)"""
 class InvalidAmountError(EventCardError):
     def __init__(self, amount: float):
-        super().__init__(f"ERROR: Monto inválido ${amount:.2f}")
+        super().__init__(amount)
         self.amount = amount
+
+    def _format(self) -> str:
+        # Mostrar el valor tal cual cuando .2f lo redondearía a otro monto
+        if math.isfinite(self.amount) and round(self.amount, 2) == self.amount:
+            return f"ERROR: Monto inválido ${self.amount:.2f}"
+        return f"ERROR: Monto inválido ${self.amount}"
@@ -4,9 +4,9 @@ Solo el organizador del evento puede realizar estas operaciones.
 """
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Tuple
 
-from database import db, Card, Transaction, TransactionType, User
+from database import db, to_cents, Card, Transaction, TransactionType, User
 from errors import (
     CardNotRegisteredError,
     CardAlreadyExistsError,
@@ -15,13 +15,22 @@ from errors import (
 )
 
 
+"""Respuesta de emisión de una tarjeta"""
+def _card_result(card: Card) -> Dict[str, Any]:
+    return {
+        "card_id": card.card_id,
+        "user_id": card.user_id,
+        "balance": card.balance
+    }
+
+
 """Organizador de Eventos."""
 class EventOrganizer:
     
     def __init__(self, organizer_id: str):
         self.organizer_id = organizer_id
 
-    """Crear un nuevo usuario en el sistema."""    
+    """Crear un nuevo usuario en el sistema (falla si el ID ya existe)."""    
     def create_user(self, user_id: str, name: str) -> Dict[str, Any]:
         user = User(user_id=user_id, name=name)
         db.add_user(user)
@@ -35,50 +44,73 @@ class EventOrganizer:
     """Emitir una nueva tarjeta a un usuario."""
     def issue_card(self, card_id: str, user_id: str, initial_balance: float = 0.0) -> Dict[str, Any]:
 
+        # Validar saldo inicial (antes de consultar la base de datos)
+        initial_cents = to_cents(initial_balance)
+        if initial_cents < 0:
+            raise InvalidAmountError(initial_balance)
+        
         # Validar que el usuario existe
-        user = db.get_user(user_id)
-        if not user:
+        if not db.user_exists(user_id):
             raise UserNotFoundError(user_id)
         
         # Verificar si la tarjeta ya existe
         if db.get_card(card_id):
             raise CardAlreadyExistsError(card_id)
         
-        # Validar saldo inicial
-        if initial_balance < 0:
-            raise InvalidAmountError(initial_balance)
-        
         # Crear tarjeta
         card = Card(
             card_id=card_id,
             user_id=user_id,
-            balance=initial_balance
+            balance_cents=initial_cents
         )
         
         db.add_card(card)
         
-        return {
-            "card_id": card.card_id,
-            "user_id": card.user_id,
-            "balance": card.balance
-        }
+        return _card_result(card)
     
 
+    """Emitir varias tarjetas en un solo lote (carga previa al evento).
+
+    `entries` son tuplas (card_id, user_id, initial_balance); acepta cualquier
+    iterable, incluso un generador. Todas las entradas se validan antes de
+    insertar, así que si alguna es inválida no se emite ninguna tarjeta.
+    """
+    def issue_cards_bulk(self, entries: Iterable[Tuple[str, str, float]]) -> List[Dict[str, Any]]:
+
+        # Validar cada entrada y crear su tarjeta en una sola pasada
+        # (incluidos IDs de tarjeta repetidos dentro del lote)
+        cards = []
+        seen_card_ids = set()
+        for card_id, user_id, initial_balance in entries:
+            initial_cents = to_cents(initial_balance)
+            if initial_cents < 0:
+                raise InvalidAmountError(initial_balance)
+            if not db.user_exists(user_id):
+                raise UserNotFoundError(user_id)
+            if card_id in seen_card_ids or db.get_card(card_id):
+                raise CardAlreadyExistsError(card_id)
+            seen_card_ids.add(card_id)
+            cards.append(Card(card_id=card_id, user_id=user_id, balance_cents=initial_cents))
+        
+        db.add_cards_bulk(cards)
+        
+        return [_card_result(card) for card in cards]
+
+
     """Recargar una tarjeta con el monto especificado."""
     def recharge_card(self, card_id: str, amount: float) -> Dict[str, Any]:
         
         # Validar monto
-        if amount <= 0:
+        amount_cents = to_cents(amount)
+        if amount_cents <= 0:
             raise InvalidAmountError(amount)
+        amount = amount_cents / 100
         
-        card = db.get_card(card_id)
-        if not card:
+        # Actualizar saldo (una sola operación atómica)
+        new_balance_cents = db.apply_delta(card_id, amount_cents)
+        if new_balance_cents is None:
             raise CardNotRegisteredError(card_id)
         
-        # Actualizar saldo
-        card.balance += amount
-        db.update_card(card)
-        
         # Registrar transacción
         transaction = Transaction(
             transaction_id=db.generate_transaction_id(),
@@ -92,8 +124,8 @@ class EventOrganizer:
         
         return {
             "transaction_id": transaction.transaction_id,
-            "card_id": card.card_id,
+            "card_id": card_id,
             "amount": amount,
-            "new_balance": card.balance,
-            "timestamp": transaction.timestamp.isoformat()
+            "new_balance": new_balance_cents / 100,
+            "timestamp": transaction.timestamp_iso
         }
\ No newline at end of file
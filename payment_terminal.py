@@ -6,7 +6,7 @@ Valida tarjetas, verifica saldo, deduce monto y registra transacciones.
 from datetime import datetime
 from typing import Dict, Any
 
-from database import db, Transaction, TransactionType
+from database import db, to_cents, Transaction, TransactionType
 from errors import (
     CardNotRegisteredError,
     InsufficientBalanceError,
@@ -23,23 +23,22 @@ class PaymentTerminal:
     """Procesar una transacción de pago."""
     def process_payment(self, card_id: str, amount: float) -> Dict[str, Any]:
         # Validar monto
-        if amount <= 0:
+        amount_cents = to_cents(amount)
+        if amount_cents <= 0:
             raise InvalidAmountError(amount)
+        amount = amount_cents / 100
         
-        # Paso 1: Leer tarjeta y verificar que pertenece a este evento
-        card = db.get_card(card_id)
-        if not card:
-            raise CardNotRegisteredError(card_id)
+        # Paso 1: Deducir monto de forma atómica si la tarjeta existe y tiene saldo suficiente
+        remaining_cents = db.apply_delta(card_id, -amount_cents)
         
-        # Paso 2: Verificar saldo suficiente
-        if card.balance < amount:
+        # Paso 2: Si no se pudo deducir, determinar el motivo
+        if remaining_cents is None:
+            card = db.get_card(card_id)
+            if not card:
+                raise CardNotRegisteredError(card_id)
             raise InsufficientBalanceError(card_id, card.balance, amount)
         
-        # Paso 3: Deducir monto
-        card.balance -= amount
-        db.update_card(card)
-        
-        # Paso 4: Registrar transacción
+        # Paso 3: Registrar transacción
         transaction = Transaction(
             transaction_id=db.generate_transaction_id(),
             card_id=card_id,
@@ -52,11 +51,11 @@ class PaymentTerminal:
         
         return {
             "transaction_id": transaction.transaction_id,
-            "card_id": card.card_id,
+            "card_id": card_id,
             "amount": amount,
-            "remaining_balance": card.balance,
+            "remaining_balance": remaining_cents / 100,
             "terminal_id": self.terminal_id,
             "shop_name": self.shop_name,
-            "timestamp": transaction.timestamp.isoformat(),
+            "timestamp": transaction.timestamp_iso,
             "status": "SUCCESS"
         }
\ No newline at end of file